@@ -1,17 +1,21 @@
 import csv
 import os
-import subprocess
+import docker
 import requests
 import re
 import logging
 import json
 import time
 import ipaddress
+import platform
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from contextlib import contextmanager
 from pathlib import Path
 from flask import Flask, render_template, request, redirect, url_for, flash
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from json_rapido import json_loads, json_dumps
 
 # Configuración de logging
 logging.basicConfig(
@@ -20,7 +24,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Sesión HTTP compartida (keep-alive) para consultar el monitor de los contenedores;
+# los reintentos se gestionan a mano en obtener_monitor
+sesion_http = requests.Session()
+sesion_http.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=Retry(total=0)))
+
+# Ruta de los volúmenes de Docker según el sistema operativo (None si no está soportado)
+_SISTEMA = platform.system()
+_PLANTILLA_RUTA_VOLUMEN = {
+    "Windows": "\\\\wsl.localhost\\docker-desktop\\mnt\\docker-desktop-disk\\data\\docker\\volumes\\{}\\_data",
+    "Linux": "/var/lib/docker/volumes/{}/_data"
+}.get(_SISTEMA)
+# Extensiones que se conservan al limpiar los volúmenes
+_EXTENSIONES_PERMITIDAS = frozenset({".acelive", ".sauth"})
+
+# Patrones de validación compilados una sola vez
+_PATRON_DOMINIO = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*\Z')
+_PATRON_NOMBRE = re.compile(r'^[a-zA-Z0-9_-]+\Z')
+
+@dataclass(slots=True)
 class EventoConfig:
     nombre: str
     titulo: str
@@ -33,7 +55,27 @@ class EventoConfig:
     content_id: str = ""
     docker_active: str = "False"
 
+    @classmethod
+    def desde_fila(cls, fila: dict) -> "EventoConfig":
+        # Construye la configuración a partir de una fila del CSV (ya con sources decodificado)
+        return cls(
+            nombre=fila["name"],
+            titulo=fila["title"],
+            puerto=int(fila["port"]),
+            tracker=fila["tracker"],
+            sources=fila["sources"],
+            host=fila["host"],
+            bitrate=int(fila["bitrate"]),
+            token=fila["service_access_token"],
+            content_id=fila.get("content_id", ""),
+            docker_active=fila.get("docker_active", "False")
+        )
+
     def _es_ip_valida(self, ip: str) -> bool:
+        # Descarte rápido de nombres de dominio sin pasar por la excepción de ipaddress:
+        # sin ':' solo puede ser IPv4, que únicamente contiene dígitos y puntos
+        if ":" not in ip and not ip.replace(".", "").isdigit():
+            return False
         try:
             ipaddress.ip_address(ip)
             return True
@@ -41,24 +83,27 @@ class EventoConfig:
             return False
 
     def _es_dominio_valido(self, dominio: str) -> bool:
-        patron = r'^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
-        return bool(re.match(patron, dominio))
+        return bool(_PATRON_DOMINIO.match(dominio))
 
     def validar(self) -> list:
         errores = []
-        if not self.nombre or not re.match(r'^[a-zA-Z0-9_-]+$', self.nombre):
-            errores.append("Nombre inválido: use solo letras, números, guiones y guiones bajos")
+        # Primero las comprobaciones baratas; la del host (ipaddress y expresión regular, la más
+        # costosa) solo se hace si todo lo demás es correcto
+        if not self.titulo.strip():
+            errores.append("El título no puede estar vacío")
         if not (1024 <= self.puerto <= 65535):
             errores.append("Puerto inválido: debe estar entre 1024 y 65535")
-        if not self._es_ip_valida(self.host) and not self._es_dominio_valido(self.host):
-            errores.append("Host inválido: debe ser una IP válida o un nombre de dominio")
         if not (0 <= self.bitrate <= 10000000):
             errores.append("Bitrate inválido")
-        if not self.titulo.strip():
-            errores.append("El título no puede estar vacío")
         # Se requiere al menos una fuente no vacía
-        if not self.sources or all(not s.get("source", "").strip() for s in self.sources):
+        if not any(s.get("source", "").strip() for s in self.sources):
             errores.append("Debe ingresar al menos una fuente")
+        if not self.nombre or not _PATRON_NOMBRE.match(self.nombre):
+            errores.append("Nombre inválido: use solo letras, números, guiones y guiones bajos")
+        if errores:
+            return errores
+        if not self._es_ip_valida(self.host) and not self._es_dominio_valido(self.host):
+            errores.append("Host inválido: debe ser una IP válida o un nombre de dominio")
         return errores
 
 class EventoManager:
@@ -67,191 +112,252 @@ class EventoManager:
         # Nuevas cabeceras con múltiples fuentes y flag de docker activo
         self.cabeceras = ["name", "title", "port", "service_access_token", "tracker", "sources", "host",
                            "bitrate", "content_id", "docker_active"]
+        # Eventos en memoria indexados por nombre; el CSV solo se relee si cambia en disco
+        self._eventos: dict = {}
+        self._mtime = None
+        # Protege la caché y el CSV frente al hilo que arranca los contenedores
+        self._lock = threading.Lock()
+        self._cliente_docker = None
+        self._lock_docker = threading.Lock()
         self._inicializar_csv()
+        self._cargar_eventos()
 
     def _inicializar_csv(self):
         if not self.csv_path.exists():
-            with self._abrir_csv('w') as file:
+            with open(self.csv_path, mode='w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 writer.writerow(self.cabeceras)
 
-    @contextmanager
-    def _abrir_csv(self, modo='r'):
-        file = None
+    def _mtime_csv(self):
         try:
-            file = open(self.csv_path, mode=modo, newline='', encoding='utf-8')
-            yield file
-        finally:
-            if file:
-                file.close()
-
-    def listar_eventos(self) -> list:
-        eventos = []
-        with self._abrir_csv('r') as file:
+            return self.csv_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _cargar_eventos(self):
+        # El mtime se toma antes de leer: si el CSV cambia durante la lectura, la próxima
+        # comprobación verá un mtime distinto y volverá a cargarlo
+        mtime = self._mtime_csv()
+        eventos = {}
+        with open(self.csv_path, mode='r', newline='', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             for row in reader:
+                if row["name"] in eventos:
+                    logger.warning(f"Evento duplicado en el CSV: '{row['name']}'; se ignora la fila repetida")
+                    continue
                 # Convertir el campo sources de JSON a lista
                 if row.get("sources"):
                     try:
-                        row["sources"] = json.loads(row["sources"])
+                        row["sources"] = json_loads(row["sources"])
                     except json.JSONDecodeError:
                         row["sources"] = []
                 else:
                     row["sources"] = []
-                eventos.append(row)
-        return eventos
+                eventos[row["name"]] = row
+        self._eventos = eventos
+        self._mtime = mtime
+
+    def _refrescar_si_modificado(self):
+        # El CSV puede modificarse desde fuera (p. ej. check_sources.py)
+        if self._mtime_csv() != self._mtime:
+            self._inicializar_csv()
+            self._cargar_eventos()
+
+    def _fila_desde_config(self, config: EventoConfig) -> dict:
+        return {
+            "name": config.nombre,
+            "title": config.titulo,
+            "port": str(config.puerto),
+            "service_access_token": config.token,
+            "tracker": config.tracker,
+            "sources": config.sources,
+            "host": config.host,
+            "bitrate": str(config.bitrate),
+            "content_id": config.content_id,
+            "docker_active": config.docker_active
+        }
+
+    def _serializar_fila(self, evento: dict) -> list:
+        sources = evento.get("sources")
+        if isinstance(sources, list):
+            sources = json_dumps(sources)
+        return [
+            evento.get("name", ""),
+            evento.get("title", ""),
+            evento.get("port", ""),
+            evento.get("service_access_token", ""),
+            evento.get("tracker", ""),
+            sources,
+            evento.get("host", ""),
+            evento.get("bitrate", ""),
+            evento.get("content_id", ""),
+            evento.get("docker_active", "False")
+        ]
+
+    def listar_eventos(self) -> list:
+        with self._lock:
+            self._refrescar_si_modificado()
+            return list(self._eventos.values())
+
+    def obtener_evento(self, nombre: str):
+        with self._lock:
+            self._refrescar_si_modificado()
+            return self._eventos.get(nombre)
 
     def agregar_evento(self, config: EventoConfig):
-        with self._abrir_csv('a') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                config.nombre,
-                config.titulo,
-                str(config.puerto),
-                config.token,
-                config.tracker,
-                json.dumps(config.sources),
-                config.host,
-                str(config.bitrate),
-                config.content_id,
-                config.docker_active
-            ])
+        evento = self._fila_desde_config(config)
+        with self._lock:
+            while True:
+                self._refrescar_si_modificado()
+                if config.nombre in self._eventos:
+                    raise ValueError(f"Ya existe un evento con el nombre '{config.nombre}'")
+                with open(self.csv_path, mode='a', newline='', encoding='utf-8') as file:
+                    # Si el CSV cambió desde la última carga, se recarga antes de añadir la fila
+                    if os.fstat(file.fileno()).st_mtime_ns != self._mtime:
+                        continue
+                    writer = csv.writer(file)
+                    writer.writerow(self._serializar_fila(evento))
+                    file.flush()
+                    mtime = os.fstat(file.fileno()).st_mtime_ns
+                self._eventos[config.nombre] = evento
+                self._mtime = mtime
+                return
 
     def actualizar_evento(self, config: EventoConfig):
-        eventos = self.listar_eventos()
-        updated = False
-        for evento in eventos:
-            if evento["name"] == config.nombre:
-                evento["title"] = config.titulo
-                evento["port"] = str(config.puerto)
-                evento["service_access_token"] = config.token
-                evento["tracker"] = config.tracker
-                evento["sources"] = json.dumps(config.sources)
-                evento["host"] = config.host
-                evento["bitrate"] = str(config.bitrate)
-                evento["content_id"] = config.content_id
-                evento["docker_active"] = config.docker_active
-                updated = True
-                break
-        if updated:
-            self._escribir_eventos(eventos)
-        else:
-            raise ValueError("Evento no encontrado para actualizar")
+        def cambio(eventos: dict) -> bool:
+            if config.nombre not in eventos:
+                raise ValueError("Evento no encontrado para actualizar")
+            eventos[config.nombre] = self._fila_desde_config(config)
+            return True
+
+        with self._lock:
+            self._reescribir(cambio)
 
     def eliminar_evento(self, nombre: str):
-        eventos = self.listar_eventos()
-        eventos = [evento for evento in eventos if evento["name"] != nombre]
-        self._escribir_eventos(eventos)
-
-    def _escribir_eventos(self, eventos: list):
-        with self._abrir_csv('w') as file:
-            writer = csv.writer(file)
-            writer.writerow(self.cabeceras)
-            for evento in eventos:
-                sources = evento.get("sources")
-                if isinstance(sources, list):
-                    sources = json.dumps(sources)
-                writer.writerow([
-                    evento.get("name", ""),
-                    evento.get("title", ""),
-                    evento.get("port", ""),
-                    evento.get("service_access_token", ""),
-                    evento.get("tracker", ""),
-                    sources,
-                    evento.get("host", ""),
-                    evento.get("bitrate", ""),
-                    evento.get("content_id", ""),
-                    evento.get("docker_active", "False")
-                ])
-
-    def _actualizar_content_id(self, nombre: str, content_id: str):
-        eventos = self.listar_eventos()
-        for evento in eventos:
-            if evento["name"] == nombre:
-                evento["content_id"] = content_id
-                break
-        self._escribir_eventos(eventos)
+        with self._lock:
+            self._reescribir(lambda eventos: eventos.pop(nombre, None) is not None)
+
+    def _reescribir(self, cambio):
+        # Aplica `cambio` sobre los eventos en memoria (retorna False si no hay nada que guardar)
+        # y reescribe el CSV. Si el CSV cambia en disco entretanto, se recarga y se repite.
+        while True:
+            self._refrescar_si_modificado()
+            try:
+                if not cambio(self._eventos):
+                    return
+                escrito = self._escribir_eventos()
+            except Exception:
+                # El cambio puede estar ya aplicado en memoria pero no en disco:
+                # se invalida la caché para que el próximo acceso recargue el CSV
+                self._mtime = None
+                raise
+            if escrito:
+                return
+            logger.warning("El CSV cambió mientras se guardaba; se recarga y se repite el cambio")
+
+    def _escribir_eventos(self) -> bool:
+        # Se escribe en un temporal que solo sustituye al CSV si nadie lo ha modificado
+        # desde la última carga; os.replace conserva el mtime del temporal
+        tmp_path = self.csv_path.with_name(self.csv_path.name + ".app.tmp")
+        try:
+            with open(tmp_path, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(self.cabeceras)
+                for evento in self._eventos.values():
+                    writer.writerow(self._serializar_fila(evento))
+            mtime = tmp_path.stat().st_mtime_ns
+            if self._mtime_csv() != self._mtime:
+                tmp_path.unlink()
+                return False
+            os.replace(tmp_path, self.csv_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._mtime = mtime
+        return True
+
+    def _actualizar_campos(self, nombre: str, **cambios):
+        # Aplica varios cambios a un evento con una única reescritura del CSV
+        def cambio(eventos: dict) -> bool:
+            evento = eventos.get(nombre)
+            if evento is None:
+                return False
+            evento.update(cambios)
+            return True
 
-    def _actualizar_docker_active(self, nombre: str, active: bool):
-        eventos = self.listar_eventos()
-        for evento in eventos:
-            if evento["name"] == nombre:
-                evento["docker_active"] = "True" if active else "False"
-                break
-        self._escribir_eventos(eventos)
+        with self._lock:
+            self._reescribir(cambio)
+
+    @property
+    def cliente_docker(self) -> docker.DockerClient:
+        # Cliente Docker compartido; se crea al primer uso para no exigir dockerd al arrancar la web
+        # Los arranques en pool_inicio pueden llegar a la vez: se comprueba de nuevo dentro del lock
+        if self._cliente_docker is None:
+            with self._lock_docker:
+                if self._cliente_docker is None:
+                    self._cliente_docker = docker.from_env()
+        return self._cliente_docker
 
     def verificar_y_limpiar_contenedor(self, nombre: str):
         try:
-            resultado = subprocess.run(
-                ["docker", "ps", "-a", "--filter", f"name=^{nombre}$", "--format", "{{.ID}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            if resultado.stdout.strip():
-                contenedor_id = resultado.stdout.strip()
-                logger.info(f"Contenedor existente encontrado: {nombre} ({contenedor_id})")
-                self.parar_contenedor(contenedor_id)
-                self.borrar_contenedor(contenedor_id)
+            contenedores = self.cliente_docker.containers.list(all=True, filters={"name": f"^{nombre}$"})
+            for contenedor in contenedores:
+                logger.info(f"Contenedor existente encontrado: {nombre} ({contenedor.short_id})")
+                self.parar_contenedor(contenedor)
+                self.borrar_contenedor(contenedor)
                 logger.info(f"Contenedor {nombre} eliminado exitosamente")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error al ejecutar comando Docker: {e.stderr}")
+        except docker.errors.APIError as e:
+            logger.error(f"Error al consultar Docker: {e.explanation}")
             raise
         except Exception as e:
             logger.error(f"Error al limpiar contenedor {nombre}: {e}")
             raise
 
-    def parar_contenedor(self, contenedor_id: str):
+    def parar_contenedor(self, contenedor: docker.models.containers.Container):
         try:
-            resultado = subprocess.run(
-                ["docker", "stop", contenedor_id],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            logger.debug(f"Contenedor detenido: {resultado.stdout}")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error al detener contenedor: {e.stderr}")
-            raise RuntimeError(f"Error al detener contenedor: {e.stderr}")
-
-    def borrar_contenedor(self, contenedor_id: str):
+            contenedor.stop()
+            logger.debug(f"Contenedor detenido: {contenedor.short_id}")
+        except docker.errors.APIError as e:
+            logger.error(f"Error al detener contenedor: {e.explanation}")
+            raise RuntimeError(f"Error al detener contenedor: {e.explanation}")
+
+    def borrar_contenedor(self, contenedor: docker.models.containers.Container):
         try:
-            resultado = subprocess.run(
-                ["docker", "rm", contenedor_id],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            logger.debug(f"Contenedor eliminado: {resultado.stdout}")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error al eliminar contenedor: {e.stderr}")
-            raise RuntimeError(f"Error al eliminar contenedor: {e.stderr}")
+            contenedor.remove()
+            logger.debug(f"Contenedor eliminado: {contenedor.short_id}")
+        except docker.errors.APIError as e:
+            logger.error(f"Error al eliminar contenedor: {e.explanation}")
+            raise RuntimeError(f"Error al eliminar contenedor: {e.explanation}")
 
     def limpiar_archivos_temporales(self, nombre_volumen: str) -> int:
         try:
-            import platform
-            if platform.system() == "Windows":
-                ruta_base = Path(f"\\\\wsl.localhost\\docker-desktop\\mnt\\docker-desktop-disk\\data\\docker\\volumes\\{nombre_volumen}\\_data")
-            elif platform.system() == "Linux":
-                ruta_base = Path(f"/var/lib/docker/volumes/{nombre_volumen}/_data")
-            else:
-                logger.warning(f"Sistema operativo no soportado: {platform.system()}")
+            if _PLANTILLA_RUTA_VOLUMEN is None:
+                logger.warning(f"Sistema operativo no soportado: {_SISTEMA}")
                 return 0
+            ruta_base = Path(_PLANTILLA_RUTA_VOLUMEN.format(nombre_volumen))
 
             if not ruta_base.exists():
                 logger.info(f"El directorio {ruta_base} no existe")
                 return 0
 
-            extensiones_permitidas = {".acelive", ".sauth"}
             archivos_eliminados = 0
-            for archivo in ruta_base.iterdir():
-                if archivo.is_file() and archivo.suffix not in extensiones_permitidas:
+            # scandir reutiliza el tipo de fichero devuelto por readdir y evita un stat por entrada
+            with os.scandir(ruta_base) as entradas:
+                for entrada in entradas:
+                    if not entrada.is_file(follow_symlinks=False):
+                        continue
+                    # Misma extensión que Path.suffix, sin construir un Path por fichero
+                    nombre = entrada.name
+                    punto = nombre.rfind(".")
+                    extension = nombre[punto:] if 0 < punto < len(nombre) - 1 else ""
+                    if extension in _EXTENSIONES_PERMITIDAS:
+                        continue
                     try:
-                        archivo.unlink()
+                        os.unlink(entrada.path)
                         archivos_eliminados += 1
-                        logger.debug(f"Archivo eliminado: {archivo}")
+                        logger.debug(f"Archivo eliminado: {entrada.path}")
                     except Exception as e:
-                        logger.error(f"Error al eliminar {archivo}: {e}")
+                        logger.error(f"Error al eliminar {entrada.path}: {e}")
             
             logger.info(f"Se eliminaron {archivos_eliminados} archivos temporales")
             return archivos_eliminados
@@ -259,7 +365,7 @@ class EventoManager:
             logger.error(f"Error en limpieza de archivos temporales: {e}")
             return 0
 
-    def _construir_comando_docker(self, config: EventoConfig) -> list:
+    def _construir_parametros_docker(self, config: EventoConfig) -> dict:
         # Seleccionar la primera fuente válida
         valid_source = None
         for fuente in config.sources:
@@ -268,45 +374,48 @@ class EventoManager:
                 break
         if not valid_source:
             raise ValueError("No se encontró una fuente válida para el evento")
-        return [
-            "docker", "run", "-d", "--restart", "unless-stopped",
-            "--name", config.nombre,
-            "-p", f"{config.puerto}:{config.puerto}/tcp",
-            "-p", f"{config.puerto}:{config.puerto}/udp",
-            "-v", f"acestreamengine_{config.nombre}:/data",
-            "lob666/acestreamengine",
-            "--port", str(config.puerto),
-            "--tracker", config.tracker,
-            "--stream-source",
-            "--name", config.nombre,
-            "--title", config.titulo,
-            "--publish-dir", "/data",
-            "--cache-dir", "/data",
-            "--skip-internal-tracker",
-            "--quality", "HD",
-            "--category", "amateur",
-            "--service-access-token", config.token,
-            "--service-remote-access",
-            "--log-debug", "1",
-            "--max-peers", "6",
-            "--max-upload-slots", "6",
-            "--source-read-timeout", "15",
-            "--source-reconnect-interval", "1",
-            "--host", config.host,
-            "--source", valid_source,
-            "--bitrate", str(config.bitrate)
-        ]
+        return {
+            "image": "lob666/acestreamengine",
+            "name": config.nombre,
+            "detach": True,
+            "restart_policy": {"Name": "unless-stopped"},
+            "ports": {
+                f"{config.puerto}/tcp": config.puerto,
+                f"{config.puerto}/udp": config.puerto
+            },
+            "volumes": {
+                f"acestreamengine_{config.nombre}": {"bind": "/data", "mode": "rw"}
+            },
+            "command": [
+                "--port", str(config.puerto),
+                "--tracker", config.tracker,
+                "--stream-source",
+                "--name", config.nombre,
+                "--title", config.titulo,
+                "--publish-dir", "/data",
+                "--cache-dir", "/data",
+                "--skip-internal-tracker",
+                "--quality", "HD",
+                "--category", "amateur",
+                "--service-access-token", config.token,
+                "--service-remote-access",
+                "--log-debug", "1",
+                "--max-peers", "6",
+                "--max-upload-slots", "6",
+                "--source-read-timeout", "15",
+                "--source-reconnect-interval", "1",
+                "--host", config.host,
+                "--source", valid_source,
+                "--bitrate", str(config.bitrate)
+            ]
+        }
 
     def obtener_monitor(self, contenedor_id: str, puerto: int, intentos: int = 10) -> dict:
-        tiempo_espera_inicial = 15  # segundos
-        tiempo_entre_intentos = 5   # segundos
-        
-        logger.info(f"Esperando {tiempo_espera_inicial} segundos para el inicio del servicio...")
-        time.sleep(tiempo_espera_inicial)
+        espera_maxima = 30  # segundos
         
         for intento in range(intentos):
             try:
-                response = requests.get(
+                response = sesion_http.get(
                     f"http://localhost:{puerto}/app/{puerto}/monitor",
                     timeout=10
                 )
@@ -332,8 +441,12 @@ class EventoManager:
             except requests.RequestException as e:
                 logger.warning(f"Reintentando obtener monitor ({intento + 1}/{intentos}): {e}")
             
-            logger.info(f"Esperando {tiempo_entre_intentos} segundos antes del siguiente intento...")
-            time.sleep(tiempo_entre_intentos)
+            if intento == intentos - 1:
+                break
+            # Espera exponencial: 1, 2, 4, 8... segundos, con un máximo de espera_maxima
+            espera = min(espera_maxima, 2 ** intento)
+            logger.info(f"Esperando {espera} segundos antes del siguiente intento...")
+            time.sleep(espera)
         
         raise RuntimeError("No se pudo obtener el monitor después de varios intentos")
 
@@ -350,27 +463,18 @@ class EventoManager:
             archivos_eliminados = self.limpiar_archivos_temporales(nombre_volumen)
             logger.info(f"Archivos temporales eliminados: {archivos_eliminados}")
             
-            comando = self._construir_comando_docker(config)
-            comando_str = " ".join(comando)
-            logger.info(f"Ejecutando comando: {comando_str}")
-            subprocess.run(comando, check=True, capture_output=True, text=True)
-            logger.info(f"Contenedor creado exitosamente para {config.nombre}")
+            parametros = self._construir_parametros_docker(config)
+            logger.info(f"Creando contenedor con parámetros: {parametros}")
+            # Con detach=True se devuelve el contenedor ya creado; obtener_monitor
+            # se encarga de reintentar mientras el servicio termina de arrancar
+            contenedor = self.cliente_docker.containers.run(**parametros)
+            logger.info(f"Contenedor creado exitosamente para {config.nombre} ({contenedor.short_id})")
             
-            # Verificar el estado del contenedor y obtener monitor
-            time.sleep(10)
-            resultado = subprocess.run(
-                ["docker", "ps", "--filter", f"name=^{config.nombre}$", "--format", "{{.ID}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            contenedor_id = resultado.stdout.strip()
-            info = self.obtener_monitor(contenedor_id, config.puerto)
+            info = self.obtener_monitor(contenedor.id, config.puerto)
             content_id = info.get('content_id', 'No encontrado')
             logger.info(f"Content ID para {config.nombre}: {content_id}")
-            self._actualizar_content_id(config.nombre, content_id)
-            # Actualizar flag de docker activo a True
-            self._actualizar_docker_active(config.nombre, True)
+            # Guardar el content id y marcar el docker como activo
+            self._actualizar_campos(config.nombre, content_id=content_id, docker_active="True")
             return f"Evento '{config.nombre}' iniciado correctamente con Content ID: {content_id}"
         except Exception as e:
             logger.error(f"Error al iniciar evento {config.nombre}: {e}")
@@ -380,6 +484,14 @@ class EventoManager:
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'
 manager = EventoManager("eventos.csv")
+# Arranques de contenedores en segundo plano, con un máximo de 4 simultáneos
+pool_inicio = ThreadPoolExecutor(max_workers=4, thread_name_prefix="evt-start")
+
+def _registrar_resultado_inicio(futuro):
+    try:
+        logger.info("Resultado de inicio en background: " + futuro.result())
+    except Exception as e:
+        logger.error(f"Error inesperado en el inicio en background: {e}")
 
 @app.route("/")
 def index():
@@ -426,8 +538,7 @@ def new_event():
 
 @app.route("/event/<nombre>/edit", methods=["GET", "POST"])
 def edit_event(nombre):
-    eventos = manager.listar_eventos()
-    evento = next((e for e in eventos if e["name"] == nombre), None)
+    evento = manager.obtener_evento(nombre)
     if not evento:
         flash("Evento no encontrado", "danger")
         return redirect(url_for("index"))
@@ -477,35 +588,19 @@ def delete_event(nombre):
 
 @app.route("/event/<nombre>/start", methods=["POST"])
 def start_event(nombre):
-    eventos = manager.listar_eventos()
-    evento = next((e for e in eventos if e["name"] == nombre), None)
+    evento = manager.obtener_evento(nombre)
     if not evento:
         flash("Evento no encontrado", "danger")
         return redirect(url_for("index"))
     try:
-        config = EventoConfig(
-            nombre=evento["name"],
-            titulo=evento["title"],
-            puerto=int(evento["port"]),
-            tracker=evento["tracker"],
-            sources=evento["sources"],
-            host=evento["host"],
-            bitrate=int(evento["bitrate"]),
-            token=evento["service_access_token"],
-            content_id=evento.get("content_id", ""),
-            docker_active=evento.get("docker_active", "False")
-        )
+        config = EventoConfig.desde_fila(evento)
     except Exception as e:
         flash(f"Error al parsear evento: {e}", "danger")
         return redirect(url_for("index"))
     
-    def run_docker():
-        result = manager.iniciar_docker_evento(config)
-        logger.info("Resultado de inicio en background: " + result)
-    
     # Ejecutar en segundo plano
-    thread = threading.Thread(target=run_docker)
-    thread.start()
+    futuro = pool_inicio.submit(manager.iniciar_docker_evento, config)
+    futuro.add_done_callback(_registrar_resultado_inicio)
     flash(f"Proceso de inicio del contenedor para '{nombre}' iniciado en segundo plano", "info")
     return redirect(url_for("index"))
 
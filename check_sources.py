@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
+import argparse
 import csv
-import json
+import os
 import subprocess
 import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from json_rapido import json_loads, json_dumps
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,83 +17,283 @@ logger = logging.getLogger(__name__)
 
 CSV_FILE = "eventos.csv"
 CABECERAS = ["name", "title", "port", "service_access_token", "tracker", "sources", "host", "bitrate", "content_id", "docker_active"]
+# Número máximo de ffprobe ejecutándose a la vez (y de eventos pendientes de escribir)
+MAX_WORKERS = 32
+# Veces que se repite la comprobación si el CSV cambia mientras se procesa
+MAX_INTENTOS = 5
+# Límites de ffprobe: timeout de E/S de red (microsegundos) y tiempo total del proceso (segundos)
+FFPROBE_RW_TIMEOUT_US = 5_000_000
+FFPROBE_TIMEOUT = 15
+# Modo daemon: resultados de ffprobe por URL y cada cuánto se vuelven a comprobar (segundos)
+SONDEOS_FILE = "eventos_sondeos.json"
+TTL_VALIDEZ = 15 * 60
+# Margen para agrupar varias escrituras seguidas del CSV en una sola comprobación
+ESPERA_CAMBIOS = 1
 
 def is_valid_source(source: str) -> bool:
     """
     Ejecuta ffprobe sobre la fuente y retorna True si la fuente es válida (exit code 0).
     """
     try:
-        # Se ejecuta ffprobe; se suprime la salida excepto errores
+        # Solo importa el código de salida: se pide el mínimo a ffprobe y se descarta su salida
         result = subprocess.run(
-            ["ffprobe", "-v", "error", "-show_format", "-show_streams", source],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            ["ffprobe", "-v", "error",
+             "-rw_timeout", str(FFPROBE_RW_TIMEOUT_US),
+             "-select_streams", "v:0", "-show_entries", "stream=codec_type", "-of", "csv=p=0",
+             source],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=FFPROBE_TIMEOUT
         )
         return result.returncode == 0
+    except subprocess.TimeoutExpired:
+        logger.warning(f"ffprobe superó {FFPROBE_TIMEOUT} segundos para {source}")
+        return False
     except Exception as e:
         logger.error(f"Error al ejecutar ffprobe para {source}: {e}")
         return False
 
-def check_sources():
+def _parsear_sources(row: dict):
+    # Convertir el campo sources de JSON a lista
+    if row.get("sources"):
+        try:
+            row["sources"] = json_loads(row["sources"])
+        except Exception as e:
+            logger.error(f"Error al parsear sources para el evento {row.get('name')}: {e}")
+            row["sources"] = []
+    else:
+        row["sources"] = []
+
+def _urls_evento(evento: dict) -> set:
+    urls = {fuente.get("source", "").strip() for fuente in evento["sources"]}
+    urls.discard("")
+    return urls
+
+def _lanzar_verificaciones(executor: ThreadPoolExecutor, evento: dict, validador, resultados: dict,
+                           referencias: Counter):
+    # `resultados` es común a toda la ejecución: una URL repetida en varios eventos se verifica una vez.
+    # `referencias` cuenta cuántos eventos pendientes de marcar usan cada URL.
+    for fuente in evento["sources"]:
+        source_url = fuente.get("source", "").strip()
+        if source_url and source_url not in resultados:
+            logger.info(f"Verificando fuente '{source_url}' para el evento {evento.get('name')}")
+            resultados[source_url] = executor.submit(validador, source_url)
+    referencias.update(_urls_evento(evento))
+
+def _liberar_verificaciones(evento: dict, resultados: dict, referencias: Counter, valid_found: bool):
+    # El evento ya está marcado. Si encontró una fuente válida, se cancelan las verificaciones
+    # aún en cola que ningún otro evento pendiente necesita; una URL cancelada se quita de
+    # `resultados` para que un evento posterior la vuelva a lanzar.
+    for source_url in _urls_evento(evento):
+        referencias[source_url] -= 1
+        if referencias[source_url] > 0:
+            continue
+        del referencias[source_url]
+        if valid_found and resultados[source_url].cancel():
+            logger.debug(f"Verificación de '{source_url}' cancelada")
+            del resultados[source_url]
+
+def _marcar_fuentes(evento: dict, resultados: dict):
+    """
+    Aplica la regla de la primera fuente válida y retorna si se encontró alguna.
+    """
+    sources = evento["sources"]
+    if not sources:
+        logger.info(f"Evento {evento.get('name')} no tiene fuentes definidas")
+        return False
+    valid_found = False
+    for fuente in sources:
+        # Si ya encontramos una fuente válida, marcamos la actual como inválida
+        if valid_found:
+            fuente["valid"] = False
+            continue
+        source_url = fuente.get("source", "").strip()
+        if not source_url:
+            fuente["valid"] = False
+            continue
+        if resultados[source_url].result():
+            logger.info(f"Fuente válida encontrada: '{source_url}' para el evento {evento.get('name')}")
+            fuente["valid"] = True
+            valid_found = True
+        else:
+            logger.info(f"Fuente inválida: '{source_url}' para el evento {evento.get('name')}")
+            fuente["valid"] = False
+    if not valid_found:
+        logger.warning(f"Ninguna fuente válida para el evento {evento.get('name')}")
+    return valid_found
+
+def _fila_csv(evento: dict, resultados: dict, referencias: Counter) -> tuple:
+    """
+    Marca las fuentes del evento y retorna su fila para el CSV junto con si cambió algún flag.
+    """
+    antes = [fuente.get("valid") for fuente in evento["sources"]]
+    valid_found = _marcar_fuentes(evento, resultados)
+    _liberar_verificaciones(evento, resultados, referencias, valid_found)
+    cambiado = antes != [fuente.get("valid") for fuente in evento["sources"]]
+    # Convertir de nuevo la lista de fuentes a JSON
+    evento["sources"] = json_dumps(evento["sources"])
+    return [evento.get(cabecera, "") for cabecera in CABECERAS], cambiado
+
+def _comprobar_csv(csv_path: Path, validador, resultados: dict) -> bool:
+    """
+    Comprueba las fuentes y actualiza el CSV. Retorna False, sin tocarlo, si el CSV se
+    modificó (p. ej. desde la web) mientras se comprobaba.
+    """
+    # Se procesa el CSV fila a fila hacia un fichero temporal que luego sustituye al original.
+    # Como mucho MAX_WORKERS eventos esperan a sus ffprobe, así se verifican en paralelo
+    # sin cargar el CSV entero en memoria; solo se guarda un resultado por URL distinta.
+    tmp_path = csv_path.with_name(csv_path.name + ".tmp")
+    try:
+        with csv_path.open('r', newline='', encoding='utf-8') as entrada, \
+                tmp_path.open('w', newline='', encoding='utf-8') as salida, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            mtime_inicial = os.fstat(entrada.fileno()).st_mtime_ns
+            reader = csv.DictReader(entrada)
+            writer = csv.writer(salida)
+            writer.writerow(CABECERAS)
+            pendientes = deque()
+            referencias = Counter()
+            # Las filas terminadas se acumulan y se escriben por lotes con writerows
+            lote = []
+            hay_cambios = False
+            for row in reader:
+                _parsear_sources(row)
+                _lanzar_verificaciones(executor, row, validador, resultados, referencias)
+                pendientes.append(row)
+                if len(pendientes) > MAX_WORKERS:
+                    fila, cambiado = _fila_csv(pendientes.popleft(), resultados, referencias)
+                    lote.append(fila)
+                    hay_cambios = hay_cambios or cambiado
+                    if len(lote) >= MAX_WORKERS:
+                        writer.writerows(lote)
+                        lote.clear()
+            while pendientes:
+                fila, cambiado = _fila_csv(pendientes.popleft(), resultados, referencias)
+                lote.append(fila)
+                hay_cambios = hay_cambios or cambiado
+            writer.writerows(lote)
+        if not hay_cambios:
+            # Nada que actualizar: no se toca el CSV (evita escrituras y avisos inútiles al daemon)
+            tmp_path.unlink()
+            logger.info("La validez de las fuentes no ha cambiado.")
+            return True
+        if csv_path.stat().st_mtime_ns != mtime_inicial:
+            tmp_path.unlink()
+            return False
+        os.replace(tmp_path, csv_path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    logger.info("CSV actualizado con la validez de las fuentes.")
+    return True
+
+def check_sources(validador=is_valid_source):
     csv_path = Path(CSV_FILE)
     if not csv_path.exists():
         logger.error("El archivo CSV no existe")
         return
 
-    # Leer todos los eventos del CSV
-    eventos = []
-    with csv_path.open('r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # Convertir el campo sources de JSON a lista
-            if row.get("sources"):
-                try:
-                    row["sources"] = json.loads(row["sources"])
-                except Exception as e:
-                    logger.error(f"Error al parsear sources para el evento {row.get('name')}: {e}")
-                    row["sources"] = []
-            else:
-                row["sources"] = []
-            eventos.append(row)
-
-    # Procesar cada evento
-    for evento in eventos:
-        sources = evento.get("sources", [])
-        if not sources:
-            logger.info(f"Evento {evento.get('name')} no tiene fuentes definidas")
-            continue
-        valid_found = False
-        for fuente in sources:
-            # Si ya encontramos una fuente válida, marcamos la actual como inválida
-            if valid_found:
-                fuente["valid"] = False
-                continue
-            source_url = fuente.get("source", "").strip()
-            if not source_url:
-                fuente["valid"] = False
-                continue
-            logger.info(f"Verificando fuente '{source_url}' para el evento {evento.get('name')}")
-            if is_valid_source(source_url):
-                logger.info(f"Fuente válida encontrada: '{source_url}' para el evento {evento.get('name')}")
-                fuente["valid"] = True
-                valid_found = True
-            else:
-                logger.info(f"Fuente inválida: '{source_url}' para el evento {evento.get('name')}")
-                fuente["valid"] = False
-        if not valid_found:
-            logger.warning(f"Ninguna fuente válida para el evento {evento.get('name')}")
-        evento["sources"] = sources
-
-    # Actualizar el CSV con los nuevos flags
-    with csv_path.open('w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=CABECERAS)
-        writer.writeheader()
-        for evento in eventos:
-            # Convertir de nuevo la lista de fuentes a JSON
-            evento["sources"] = json.dumps(evento.get("sources", []))
-            writer.writerow(evento)
-    logger.info("CSV actualizado con la validez de las fuentes.")
+    # Los resultados se conservan entre intentos: al repetir no se vuelve a lanzar ffprobe
+    resultados = {}
+    for intento in range(MAX_INTENTOS):
+        if _comprobar_csv(csv_path, validador, resultados):
+            return
+        logger.info(f"El CSV cambió durante la comprobación; se repite ({intento + 1}/{MAX_INTENTOS})")
+    logger.error("El CSV no dejó de cambiar durante la comprobación; no se ha actualizado")
+
+class CacheSondeos:
+    """
+    Resultados de ffprobe por URL, persistidos en SONDEOS_FILE. Una URL solo se vuelve a
+    comprobar cuando su resultado tiene más de `ttl` segundos.
+    """
+
+    def __init__(self, ruta: str, ttl: float):
+        self.ruta = Path(ruta)
+        self.ttl = ttl
+        self._sondeos = self._cargar()
+        self._usadas = set()
+
+    def _cargar(self) -> dict:
+        if not self.ruta.exists():
+            return {}
+        try:
+            with self.ruta.open('r', encoding='utf-8') as file:
+                return json_loads(file.read())
+        except Exception as e:
+            logger.error(f"Error al leer {self.ruta}, se descartan los sondeos previos: {e}")
+            return {}
+
+    def es_valida(self, source: str) -> bool:
+        sondeo = self._sondeos.get(source)
+        ahora = time.time()
+        if sondeo is None or ahora - sondeo["checked"] >= self.ttl:
+            sondeo = {"valid": is_valid_source(source), "checked": ahora}
+            self._sondeos[source] = sondeo
+        else:
+            logger.debug(f"Usando resultado previo para '{source}'")
+        self._usadas.add(source)
+        return sondeo["valid"]
+
+    def guardar(self):
+        # Solo se conservan las URLs que siguen apareciendo en el CSV
+        self._sondeos = {url: self._sondeos[url] for url in self._usadas}
+        self._usadas = set()
+        tmp_path = self.ruta.with_name(self.ruta.name + ".tmp")
+        with tmp_path.open('w', encoding='utf-8') as file:
+            file.write(json_dumps(self._sondeos))
+        os.replace(tmp_path, self.ruta)
+
+def vigilar_fuentes():
+    """
+    Modo daemon: comprueba las fuentes cada vez que cambia el CSV y, además, cada TTL_VALIDEZ
+    segundos. Solo se lanza ffprobe para URLs nuevas o cuyo resultado ha caducado.
+    """
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        logger.error("El modo daemon requiere el paquete watchdog (pip install watchdog)")
+        return
+
+    csv_path = Path(CSV_FILE).resolve()
+    cambio = threading.Event()
+
+    class ManejadorCSV(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+                return
+            rutas = {os.fsdecode(event.src_path), os.fsdecode(getattr(event, "dest_path", ""))}
+            if str(csv_path) in rutas:
+                cambio.set()
+
+    cache = CacheSondeos(SONDEOS_FILE, TTL_VALIDEZ)
+    observer = Observer()
+    observer.schedule(ManejadorCSV(), str(csv_path.parent), recursive=False)
+    observer.start()
+    logger.info(f"Vigilando {csv_path} (revisión completa cada {TTL_VALIDEZ} segundos)")
+    try:
+        while True:
+            try:
+                check_sources(cache.es_valida)
+                cache.guardar()
+            except Exception as e:
+                logger.error(f"Error al comprobar las fuentes: {e}")
+            if cambio.wait(timeout=TTL_VALIDEZ):
+                logger.info("Cambio detectado en el CSV")
+                time.sleep(ESPERA_CAMBIOS)
+            cambio.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
 
 if __name__ == "__main__":
-    check_sources()
+    parser = argparse.ArgumentParser(description="Comprueba con ffprobe la validez de las fuentes de eventos.csv")
+    parser.add_argument("--daemon", action="store_true",
+                        help="seguir en ejecución y volver a comprobar las fuentes cuando cambie el CSV")
+    args = parser.parse_args()
+    if args.daemon:
+        vigilar_fuentes()
+    else:
+        check_sources()
@@ -0,0 +1,14 @@
+# Serialización JSON de la columna sources, compartida por app.py y check_sources.py
+# para que los dos escritores de eventos.csv generen siempre el mismo formato.
+import json
+
+# orjson (si está instalado) es bastante más rápido que json
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(objeto) -> str:
+        return orjson.dumps(objeto).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps